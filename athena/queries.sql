@@ -20,7 +20,7 @@ SELECT
     pressure,
     event_timestamp,
     total_anomaly_score
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '24' HOUR
 ORDER BY event_timestamp DESC
 LIMIT 100;
@@ -35,7 +35,7 @@ SELECT
     MAX(temperature) as max_temperature,
     MIN(temperature) as min_temperature,
     STDDEV(temperature) as temp_std_dev
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '7' DAY
 GROUP BY machine_id
 ORDER BY avg_temperature DESC;
@@ -58,7 +58,7 @@ SELECT
         WHEN total_anomaly_score >= 1 THEN 'MEDIUM'
         ELSE 'NORMAL'
     END as severity_level
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE total_anomaly_score > 0 
     AND event_timestamp >= NOW() - INTERVAL '24' HOUR
 ORDER BY event_timestamp DESC;
@@ -70,7 +70,7 @@ SELECT
     COUNT(*) as total_readings,
     SUM(CASE WHEN total_anomaly_score > 0 THEN 1 ELSE 0 END) as anomaly_count,
     (SUM(CASE WHEN total_anomaly_score > 0 THEN 1 ELSE 0 END) * 100.0 / COUNT(*)) as anomaly_percentage
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '30' DAY
 GROUP BY machine_id, DATE(event_timestamp)
 ORDER BY machine_id, date;
@@ -83,7 +83,7 @@ SELECT
     SUM(CASE WHEN temperature > 80 THEN 1 ELSE 0 END) as high_temp_count,
     AVG(temperature) as avg_temperature,
     MAX(temperature) as max_temperature
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '7' DAY
 GROUP BY machine_id, EXTRACT(HOUR FROM event_timestamp)
 ORDER BY machine_id, hour_of_day;
@@ -101,7 +101,7 @@ SELECT
     AVG(vibration) as avg_vibration,
     AVG(pressure) as avg_pressure,
     COUNT(*) as reading_count
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '7' DAY
 GROUP BY machine_id, DATE(event_timestamp), EXTRACT(HOUR FROM event_timestamp)
 ORDER BY machine_id, date, hour;
@@ -115,7 +115,7 @@ SELECT
     AVG(pressure) as avg_pressure,
     STDDEV(temperature) as temp_volatility,
     COUNT(*) as daily_readings
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '30' DAY
 GROUP BY machine_id, DATE(event_timestamp)
 ORDER BY machine_id, date;
@@ -134,7 +134,7 @@ WITH machine_stats AS (
         STDDEV(temperature) as temp_std,
         COUNT(*) as total_readings,
         SUM(CASE WHEN total_anomaly_score > 0 THEN 1 ELSE 0 END) as anomaly_count
-    FROM sensor_data 
+    FROM sensor_data_raw 
     WHERE event_timestamp >= NOW() - INTERVAL '7' DAY
     GROUP BY machine_id
 )
@@ -164,7 +164,7 @@ SELECT
         WHEN AVG(temperature) < 80 AND AVG(vibration) < 2.5 AND AVG(pressure) < 160 THEN 'FAIR'
         ELSE 'POOR'
     END as efficiency_rating
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '7' DAY
 GROUP BY machine_id
 ORDER BY efficiency_rating, avg_temperature;
@@ -184,7 +184,7 @@ SELECT
     MAX(temperature) as max_temperature,
     MAX(vibration) as max_vibration,
     MAX(pressure) as max_pressure
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '24' HOUR
 GROUP BY machine_id
 HAVING SUM(CASE WHEN total_anomaly_score >= 2 THEN 1 ELSE 0 END) > 0
@@ -203,7 +203,7 @@ SELECT
     (AVG(temperature) - LAG(AVG(temperature), 1) OVER (PARTITION BY machine_id ORDER BY DATE(event_timestamp))) as temp_trend,
     (AVG(vibration) - LAG(AVG(vibration), 1) OVER (PARTITION BY machine_id ORDER BY DATE(event_timestamp))) as vib_trend,
     (AVG(pressure) - LAG(AVG(pressure), 1) OVER (PARTITION BY machine_id ORDER BY DATE(event_timestamp))) as pressure_trend
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '14' DAY
 GROUP BY machine_id, DATE(event_timestamp)
 ORDER BY machine_id, date;
@@ -220,7 +220,7 @@ SELECT
     AVG(vibration) as avg_vibration,
     AVG(pressure) as avg_pressure,
     SUM(CASE WHEN total_anomaly_score > 0 THEN 1 ELSE 0 END) as anomaly_count
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '7' DAY
 GROUP BY EXTRACT(HOUR FROM event_timestamp)
 ORDER BY total_readings DESC;
@@ -235,7 +235,7 @@ SELECT
     AVG(pressure) as weekly_avg_pressure,
     SUM(CASE WHEN total_anomaly_score > 0 THEN 1 ELSE 0 END) as weekly_anomalies,
     (SUM(CASE WHEN total_anomaly_score > 0 THEN 1 ELSE 0 END) * 100.0 / COUNT(*)) as weekly_anomaly_rate
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '8' WEEK
 GROUP BY machine_id, DATE_TRUNC('week', event_timestamp)
 ORDER BY machine_id, week_start;
@@ -254,7 +254,7 @@ SELECT
     (COUNT(temperature) * 100.0 / COUNT(*)) as temp_completeness,
     (COUNT(vibration) * 100.0 / COUNT(*)) as vib_completeness,
     (COUNT(pressure) * 100.0 / COUNT(*)) as pressure_completeness
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '7' DAY
 GROUP BY machine_id
 ORDER BY machine_id;
@@ -272,7 +272,7 @@ SELECT
         WHEN pressure > 200 OR pressure < 50 THEN 'PRESSURE_OUTLIER'
         ELSE 'NORMAL'
     END as outlier_type
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '24' HOUR
     AND (temperature > 100 OR temperature < 20 
          OR vibration > 5 OR vibration < 0 
@@ -296,7 +296,7 @@ SELECT
         WHEN AVG(temperature) < 75 AND AVG(vibration) < 2.0 THEN 'MODERATE_EFFICIENCY'
         ELSE 'HIGH_ENERGY_USAGE'
     END as efficiency_category
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '7' DAY
 GROUP BY machine_id
 ORDER BY efficiency_category, avg_temperature;
@@ -319,7 +319,7 @@ SELECT
         WHEN total_anomaly_score >= 1 THEN 'MEDIUM_ALERT'
         ELSE 'NORMAL'
     END as alert_level
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '1' HOUR
     AND total_anomaly_score > 0
 ORDER BY total_anomaly_score DESC, event_timestamp DESC;
@@ -332,7 +332,7 @@ SELECT
     COUNT(CASE WHEN total_anomaly_score = 2 THEN 1 END) as high_alerts,
     COUNT(CASE WHEN total_anomaly_score = 1 THEN 1 END) as medium_alerts,
     MAX(event_timestamp) as last_alert_time
-FROM sensor_data 
+FROM sensor_data_raw 
 WHERE event_timestamp >= NOW() - INTERVAL '7' DAY
     AND total_anomaly_score > 0
 GROUP BY machine_id
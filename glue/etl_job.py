@@ -7,27 +7,64 @@ This job processes raw sensor data and creates structured tables for analytics
 import sys
 from awsglue.transforms import *
 from awsglue.utils import getResolvedOptions
+from pyspark import StorageLevel
 from pyspark.context import SparkContext
 from awsglue.context import GlueContext
 from awsglue.job import Job
-from awsglue.dynamicframe import DynamicFrame
 from pyspark.sql import SparkSession
 from pyspark.sql.functions import *
 from pyspark.sql.types import *
+from pyspark.sql.window import Window
+from datetime import datetime, timedelta
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Glue context
-args = getResolvedOptions(sys.argv, ['JOB_NAME'])
+# Initialize Glue context; WINDOW_END and WINDOW_HOURS are optional job arguments
+optional_args = [name for name in ['WINDOW_END', 'WINDOW_HOURS'] if f"--{name}" in sys.argv]
+args = getResolvedOptions(sys.argv, ['JOB_NAME'] + optional_args)
 sc = SparkContext()
 glueContext = GlueContext(sc)
 spark = glueContext.spark_session
 job = Job(glueContext)
 job.init(args['JOB_NAME'], args)
 
+# Write snappy Parquet and only replace the partitions present in each run
+spark.conf.set("spark.sql.parquet.compression.codec", "snappy")
+spark.conf.set("spark.sql.sources.partitionOverwriteMode", "dynamic")
+
+# Firehose partitions by UTC arrival hour, so evaluate timestamps in UTC
+spark.conf.set("spark.sql.session.timeZone", "UTC")
+
+# Incremental processing window, in event hours. Firehose buffers for up to 5 minutes, so
+# events of an hour can land in the next arrival-hour partition; one extra arrival hour
+# is read to pick them up. By default the window ends one hour before the current hour,
+# so that extra arrival hour is already complete.
+ARRIVAL_LATENESS_HOURS = 1
+WINDOW_HOURS = int(args.get('WINDOW_HOURS', 6))
+if 'WINDOW_END' in args:
+    WINDOW_END = datetime.strptime(args['WINDOW_END'], "%Y-%m-%dT%H")
+else:
+    WINDOW_END = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=ARRIVAL_LATENESS_HOURS)
+WINDOW_START = WINDOW_END - timedelta(hours=WINDOW_HOURS)
+
+# Schema of the raw IoT payload, supplied up front so the reader never infers or merges schemas
+SENSOR_DATA_SCHEMA = StructType([
+    StructField("machine_id", StringType()),
+    StructField("temperature", DoubleType()),
+    StructField("vibration", DoubleType()),
+    StructField("pressure", DoubleType()),
+    StructField("timestamp", LongType())
+])
+
+def hour_key(value):
+    """
+    Encode an hour as a sortable yyyyMMddHH integer, matching the arrival partition layout
+    """
+    return value.year * 1000000 + value.month * 10000 + value.day * 100 + value.hour
+
 def process_sensor_data():
     """
     Main ETL function to process sensor data
@@ -36,70 +73,79 @@ def process_sensor_data():
         logger.info("Starting IoT sensor data ETL job...")
         
         # Read data from S3
-        input_path = "s3://iot-sensor-data-bucket/sensor_data/"
-        
-        # Create DynamicFrame from S3 data
-        sensor_dyf = glueContext.create_dynamic_frame.from_options(
-            connection_type="s3",
-            connection_options={
-                "paths": [input_path],
-                "recurse": True
-            },
-            format="json"
-        )
-        
-        logger.info(f"Read {sensor_dyf.count()} records from S3")
-        
-        # Convert to Spark DataFrame for easier processing
-        sensor_df = sensor_dyf.toDF()
+        input_path = "s3://iot-sensor-data-bucket/parquet/sensor_data/"
         
-        # Add processing timestamp
-        sensor_df = sensor_df.withColumn("processing_timestamp", current_timestamp())
+        logger.info(f"Processing event hours from {WINDOW_START} to {WINDOW_END}")
         
-        # Parse timestamp if it exists
-        if "timestamp" in sensor_df.columns:
-            sensor_df = sensor_df.withColumn(
-                "event_timestamp", 
-                from_unixtime(col("timestamp"))
-            )
-        else:
-            sensor_df = sensor_df.withColumn("event_timestamp", current_timestamp())
+        # Firehose delivers Parquet partitioned by arrival hour; filtering on the partition
+        # columns prunes the listing and read to the arrival hours of this window
+        sensor_df = spark.read.schema(SENSOR_DATA_SCHEMA).parquet(input_path)
+        arrival_hour_key = col("year") * 1000000 + col("month") * 10000 + col("day") * 100 + col("hour")
+        sensor_df = sensor_df.filter(
+            (arrival_hour_key >= hour_key(WINDOW_START)) &
+            (arrival_hour_key < hour_key(WINDOW_END + timedelta(hours=ARRIVAL_LATENESS_HOURS)))
+        )
         
-        # Add derived features
+        # Readings without a timestamp fall back to the start of their arrival hour
+        arrival_timestamp = expr("make_timestamp(year, month, day, hour, 0, 0)")
         sensor_df = sensor_df.withColumn(
-            "temp_vib_ratio", 
-            col("temperature") / (col("vibration") + 0.001)
-        ).withColumn(
-            "pressure_temp_ratio", 
-            col("pressure") / (col("temperature") + 0.001)
+            "event_timestamp", coalesce(col("timestamp").cast("timestamp"), arrival_timestamp)
         )
         
-        # Add anomaly detection logic
-        sensor_df = sensor_df.withColumn(
-            "is_anomaly_temp", 
-            when(col("temperature") > 80, 1).otherwise(0)
-        ).withColumn(
-            "is_anomaly_vib", 
-            when(col("vibration") > 2.0, 1).otherwise(0)
-        ).withColumn(
-            "is_anomaly_pressure", 
-            when(col("pressure") > 150, 1).otherwise(0)
-        ).withColumn(
-            "total_anomaly_score", 
-            col("is_anomaly_temp") + col("is_anomaly_vib") + col("is_anomaly_pressure")
+        # Keep only events of the window, so each output hour is rewritten from all of its
+        # events; the arrival-time partition columns are replaced by event-time ones below
+        window_start = lit(WINDOW_START.strftime("%Y-%m-%d %H:%M:%S")).cast("timestamp")
+        window_end = lit(WINDOW_END.strftime("%Y-%m-%d %H:%M:%S")).cast("timestamp")
+        sensor_df = sensor_df.filter(
+            (col("event_timestamp") >= window_start) & (col("event_timestamp") < window_end)
+        ).drop("year", "month", "day", "hour")
+        event_timestamp = col("event_timestamp")
+        
+        # Anomaly detection logic; boolean casts to tinyint avoid a branch per flag and
+        # the coalesce keeps missing readings scored as 0
+        no_anomaly = lit(0).cast("tinyint")
+        is_anomaly_temp = coalesce((col("temperature") > 80).cast("tinyint"), no_anomaly)
+        is_anomaly_vib = coalesce((col("vibration") > 2.0).cast("tinyint"), no_anomaly)
+        is_anomaly_pressure = coalesce((col("pressure") > 150).cast("tinyint"), no_anomaly)
+        
+        # Add processing timestamp, derived features, anomaly flags and date
+        # partitioning columns in a single projection
+        sensor_df = sensor_df.select(
+            "*",
+            current_timestamp().alias("processing_timestamp"),
+            (col("temperature") / (col("vibration") + 0.001)).alias("temp_vib_ratio"),
+            (col("pressure") / (col("temperature") + 0.001)).alias("pressure_temp_ratio"),
+            is_anomaly_temp.alias("is_anomaly_temp"),
+            is_anomaly_vib.alias("is_anomaly_vib"),
+            is_anomaly_pressure.alias("is_anomaly_pressure"),
+            (is_anomaly_temp + is_anomaly_vib + is_anomaly_pressure).alias("total_anomaly_score"),
+            year(event_timestamp).alias("year"),
+            month(event_timestamp).alias("month"),
+            dayofmonth(event_timestamp).alias("day"),
+            hour(event_timestamp).alias("hour")
         )
         
-        # Add date partitioning columns
-        sensor_df = sensor_df.withColumn(
-            "year", year(col("event_timestamp"))
-        ).withColumn(
-            "month", month(col("event_timestamp"))
-        ).withColumn(
-            "day", dayofmonth(col("event_timestamp"))
-        ).withColumn(
-            "hour", hour(col("event_timestamp"))
+        # Create time-series features; windows are bounded to one machine-day so a
+        # single busy machine doesn't funnel its entire history through one task
+        window_spec = Window.partitionBy("machine_id", "year", "month", "day").orderBy("event_timestamp")
+        
+        temp_lag = lag("temperature", 1).over(window_spec)
+        vib_lag = lag("vibration", 1).over(window_spec)
+        pressure_lag = lag("pressure", 1).over(window_spec)
+        
+        sensor_df = sensor_df.select(
+            "*",
+            temp_lag.alias("temp_lag_1"),
+            vib_lag.alias("vib_lag_1"),
+            pressure_lag.alias("pressure_lag_1"),
+            (col("temperature") - temp_lag).alias("temp_diff"),
+            (col("vibration") - vib_lag).alias("vib_diff"),
+            (col("pressure") - pressure_lag).alias("pressure_diff")
         )
         
+        # Persist so the aggregations, writes and final statistics don't recompute the whole lineage
+        sensor_df = sensor_df.persist(StorageLevel.MEMORY_AND_DISK)
+        
         # Create machine-specific aggregations
         machine_stats = sensor_df.groupBy("machine_id", "year", "month", "day", "hour").agg(
             avg("temperature").alias("avg_temperature"),
@@ -118,62 +164,41 @@ def process_sensor_data():
             sum("total_anomaly_score").alias("anomaly_count")
         )
         
-        # Create time-series features
-        window_spec = Window.partitionBy("machine_id").orderBy("event_timestamp")
-        
-        sensor_df = sensor_df.withColumn(
-            "temp_lag_1", lag("temperature", 1).over(window_spec)
-        ).withColumn(
-            "vib_lag_1", lag("vibration", 1).over(window_spec)
-        ).withColumn(
-            "pressure_lag_1", lag("pressure", 1).over(window_spec)
-        ).withColumn(
-            "temp_diff", col("temperature") - col("temp_lag_1")
-        ).withColumn(
-            "vib_diff", col("vibration") - col("vib_lag_1")
-        ).withColumn(
-            "pressure_diff", col("pressure") - col("pressure_lag_1")
-        )
-        
-        # Write processed data back to S3
+        # Write processed data back to S3 with partitioning
         output_path = "s3://iot-sensor-data-bucket/processed_data/"
         
-        # Convert back to DynamicFrame
-        processed_dyf = DynamicFrame.fromDF(sensor_df, glueContext, "processed_sensor_data")
-        
-        # Write with partitioning
-        glueContext.write_dynamic_frame.from_options(
-            frame=processed_dyf,
-            connection_type="s3",
-            connection_options={
-                "path": output_path,
-                "partitionKeys": ["year", "month", "day", "hour"]
-            },
-            format="parquet"
+        # Range-partition and sort by machine within each hour so Parquet row-group
+        # min/max statistics let readers skip row groups when filtering on machine_id.
+        # Leading with the partition columns satisfies the writer's required ordering,
+        # so Spark doesn't add its own sort on top.
+        partition_columns = ["year", "month", "day", "hour"]
+        clustered_df = sensor_df.repartitionByRange(*partition_columns, "machine_id").sortWithinPartitions(
+            *partition_columns, "machine_id", "event_timestamp"
         )
         
-        # Write machine statistics
-        machine_stats_dyf = DynamicFrame.fromDF(machine_stats, glueContext, "machine_statistics")
+        clustered_df.write.partitionBy(*partition_columns).mode("overwrite").parquet(output_path)
         
+        # Write machine statistics
         stats_output_path = "s3://iot-sensor-data-bucket/machine_statistics/"
         
-        glueContext.write_dynamic_frame.from_options(
-            frame=machine_stats_dyf,
-            connection_type="s3",
-            connection_options={
-                "path": stats_output_path,
-                "partitionKeys": ["year", "month", "day", "hour"]
-            },
-            format="parquet"
-        )
+        machine_stats.write.partitionBy("year", "month", "day", "hour").mode("overwrite").parquet(stats_output_path)
         
         logger.info("ETL job completed successfully!")
         
+        # Compute all statistics in a single pass
+        stats_row = sensor_df.agg(
+            count("*").alias("total_records_processed"),
+            approx_count_distinct("machine_id", rsd=0.05).alias("unique_machines"),
+            sum((col("total_anomaly_score") > 0).cast("int")).alias("anomaly_records")
+        ).first()
+        
+        sensor_df.unpersist(blocking=False)
+        
         # Return statistics
         return {
-            "total_records_processed": sensor_df.count(),
-            "unique_machines": sensor_df.select("machine_id").distinct().count(),
-            "anomaly_records": sensor_df.filter(col("total_anomaly_score") > 0).count()
+            "total_records_processed": stats_row["total_records_processed"],
+            "unique_machines": stats_row["unique_machines"],
+            "anomaly_records": stats_row["anomaly_records"] or 0
         }
         
     except Exception as e:
@@ -215,9 +240,12 @@ def create_analytics_views():
         """)
         
         # Write anomaly summary
-        anomaly_summary.write.mode("overwrite").parquet(
-            "s3://iot-sensor-data-bucket/analytics/anomaly_summary/"
-        )
+        anomaly_summary_path = "s3://iot-sensor-data-bucket/analytics/anomaly_summary/"
+        
+        anomaly_summary.write.mode("overwrite").parquet(anomaly_summary_path)
+        
+        # Register the written daily summary so the monthly rollup reads it instead of rescanning sensor_data
+        spark.read.parquet(anomaly_summary_path).createOrReplaceTempView("anomaly_summary")
         
         # Create machine performance view
         machine_performance = spark.sql("""
@@ -231,20 +259,7 @@ def create_analytics_views():
                 SUM(anomaly_records) as monthly_anomalies,
                 SUM(total_records) as monthly_total_records,
                 (SUM(anomaly_records) / SUM(total_records)) * 100 as anomaly_percentage
-            FROM (
-                SELECT 
-                    machine_id,
-                    year,
-                    month,
-                    day,
-                    COUNT(*) as total_records,
-                    SUM(CASE WHEN total_anomaly_score > 0 THEN 1 ELSE 0 END) as anomaly_records,
-                    AVG(temperature) as avg_temperature,
-                    AVG(vibration) as avg_vibration,
-                    AVG(pressure) as avg_pressure
-                FROM sensor_data
-                GROUP BY machine_id, year, month, day
-            )
+            FROM anomaly_summary
             GROUP BY machine_id, year, month
             ORDER BY machine_id, year, month
         """)
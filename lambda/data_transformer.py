@@ -1,29 +1,115 @@
 import boto3
-import json
+from botocore.config import Config
+import fastjsonschema
 import logging
+import orjson
 import os
 import time
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from typing import Dict, Any, List, Iterator, NamedTuple
 from datetime import datetime, timedelta
-import statistics
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize AWS clients
-kinesis = boto3.client('kinesis')
-firehose = boto3.client('firehose')
+# Initialize AWS clients once per container so warm invocations reuse connections.
+# total_max_attempts counts the first call, so a put takes at most
+# 3 attempts x (2 s connect + 5 s read) + backoff, about 22 s
+client_config = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5,
+    retries={'mode': 'adaptive', 'total_max_attempts': 3}
+)
+kinesis = boto3.client('kinesis', config=client_config)
+firehose = boto3.client('firehose', config=client_config)
+
+# Shared worker pool for independent AWS calls; kept well below max_pool_connections
+executor = ThreadPoolExecutor(max_workers=4)
 
 # Environment variables
 KINESIS_STREAM_NAME = os.environ.get('KINESIS_STREAM_NAME')
 FIREHOSE_STREAM_NAME = os.environ.get('FIREHOSE_STREAM_NAME')
 
+# Constants
+KINESIS_MAX_BATCH_RECORDS = 500
+KINESIS_MAX_BATCH_BYTES = 5 * 1024 * 1024
+FIREHOSE_MAX_BATCH_RECORDS = 500
+FIREHOSE_MAX_BATCH_BYTES = 4 * 1024 * 1024
+MAX_PUT_RETRIES = 3
+PUT_RETRY_BASE_DELAY = 0.1  # seconds
+
 class DataTransformationError(Exception):
     """Custom exception for data transformation errors"""
     pass
 
-def calculate_statistical_features(sensor_data: List[Dict[str, Any]]) -> Dict[str, float]:
+# Compiled once per container; each record is then checked with a single call
+validate_sensor_schema = fastjsonschema.compile({
+    'type': 'object',
+    'required': ['machine_id', 'temperature', 'vibration', 'pressure'],
+    'properties': {
+        'machine_id': {'type': 'string'},
+        'temperature': {'type': 'number'},
+        'vibration': {'type': 'number'},
+        'pressure': {'type': 'number'},
+        'timestamp': {'type': 'integer'}
+    }
+})
+
+class SensorReading(NamedTuple):
+    """Sensor reading with fields already converted to their numeric types"""
+    machine_id: str
+    temperature: float
+    vibration: float
+    pressure: float
+    timestamp: int
+
+def parse_sensor_reading(payload: Dict[str, Any]) -> SensorReading:
+    """
+    Validate a raw payload and convert it into a SensorReading
+    
+    Args:
+        payload: Raw sensor record
+        
+    Returns:
+        SensorReading with converted field values
+        
+    Raises:
+        DataTransformationError: If data is invalid
+    """
+    try:
+        validate_sensor_schema(payload)
+    except fastjsonschema.JsonSchemaException as e:
+        raise DataTransformationError(f"Invalid sensor data: {str(e)}")
+    
+    # Normalize numeric types, adding a timestamp if not present
+    return SensorReading(
+        machine_id=payload['machine_id'],
+        temperature=float(payload['temperature']),
+        vibration=float(payload['vibration']),
+        pressure=float(payload['pressure']),
+        timestamp=int(payload.get('timestamp', time.time()))
+    )
+
+def sensor_readings_array(readings: List[SensorReading]) -> np.ndarray:
+    """
+    Convert sensor readings into a (N, 3) array of temperature, vibration and pressure
+    
+    Args:
+        readings: List of sensor readings
+        
+    Returns:
+        numpy array with one row per reading
+    """
+    return np.array(
+        [(reading.temperature, reading.vibration, reading.pressure) for reading in readings],
+        dtype=np.float64
+    ).reshape(-1, 3)
+
+def calculate_statistical_features(sensor_data: List[SensorReading]) -> Dict[str, float]:
     """
     Calculate statistical features from sensor data
     
@@ -36,28 +122,23 @@ def calculate_statistical_features(sensor_data: List[Dict[str, Any]]) -> Dict[st
     if not sensor_data:
         return {}
     
-    temperatures = [float(reading['temperature']) for reading in sensor_data]
-    vibrations = [float(reading['vibration']) for reading in sensor_data]
-    pressures = [float(reading['pressure']) for reading in sensor_data]
-    
-    features = {
-        'temp_mean': statistics.mean(temperatures),
-        'temp_std': statistics.stdev(temperatures) if len(temperatures) > 1 else 0,
-        'temp_min': min(temperatures),
-        'temp_max': max(temperatures),
-        'vib_mean': statistics.mean(vibrations),
-        'vib_std': statistics.stdev(vibrations) if len(vibrations) > 1 else 0,
-        'vib_min': min(vibrations),
-        'vib_max': max(vibrations),
-        'pressure_mean': statistics.mean(pressures),
-        'pressure_std': statistics.stdev(pressures) if len(pressures) > 1 else 0,
-        'pressure_min': min(pressures),
-        'pressure_max': max(pressures)
-    }
+    readings = sensor_readings_array(sensor_data)
+    
+    means = readings.mean(axis=0)
+    stds = readings.std(axis=0, ddof=1) if len(readings) > 1 else np.zeros(3)
+    mins = readings.min(axis=0)
+    maxs = readings.max(axis=0)
+    
+    features = {}
+    for i, prefix in enumerate(('temp', 'vib', 'pressure')):
+        features[f'{prefix}_mean'] = float(means[i])
+        features[f'{prefix}_std'] = float(stds[i])
+        features[f'{prefix}_min'] = float(mins[i])
+        features[f'{prefix}_max'] = float(maxs[i])
     
     return features
 
-def detect_trends(sensor_data: List[Dict[str, Any]]) -> Dict[str, str]:
+def detect_trends(sensor_data: List[SensorReading]) -> Dict[str, str]:
     """
     Detect trends in sensor data
     
@@ -70,57 +151,55 @@ def detect_trends(sensor_data: List[Dict[str, Any]]) -> Dict[str, str]:
     if len(sensor_data) < 3:
         return {'trend': 'insufficient_data'}
     
-    temperatures = [float(reading['temperature']) for reading in sensor_data]
-    vibrations = [float(reading['vibration']) for reading in sensor_data]
-    pressures = [float(reading['pressure']) for reading in sensor_data]
+    # Only the first and last readings are compared
+    first, last = sensor_readings_array([sensor_data[0], sensor_data[-1]])
+    temp_delta, vib_delta, pressure_delta = (last - first).tolist()
     
     trends = {}
     
     # Temperature trend
-    if temperatures[-1] > temperatures[0] + 5:
+    if temp_delta > 5:
         trends['temp_trend'] = 'increasing'
-    elif temperatures[-1] < temperatures[0] - 5:
+    elif temp_delta < -5:
         trends['temp_trend'] = 'decreasing'
     else:
         trends['temp_trend'] = 'stable'
     
     # Vibration trend
-    if vibrations[-1] > vibrations[0] + 0.5:
+    if vib_delta > 0.5:
         trends['vib_trend'] = 'increasing'
-    elif vibrations[-1] < vibrations[0] - 0.5:
+    elif vib_delta < -0.5:
         trends['vib_trend'] = 'decreasing'
     else:
         trends['vib_trend'] = 'stable'
     
     # Pressure trend
-    if pressures[-1] > pressures[0] + 10:
+    if pressure_delta > 10:
         trends['pressure_trend'] = 'increasing'
-    elif pressures[-1] < pressures[0] - 10:
+    elif pressure_delta < -10:
         trends['pressure_trend'] = 'decreasing'
     else:
         trends['pressure_trend'] = 'stable'
     
     return trends
 
-def enrich_sensor_data(record: Dict[str, Any]) -> Dict[str, Any]:
+def enrich_sensor_data(record: Dict[str, Any], reading: SensorReading) -> Dict[str, Any]:
     """
     Enrich sensor data with additional metadata and derived features
     
     Args:
         record: Original sensor record
+        reading: Parsed sensor reading for the record
         
     Returns:
         Enriched sensor record
     """
     enriched = record.copy()
-    
-    # Add timestamp if not present
-    if 'timestamp' not in enriched:
-        enriched['timestamp'] = int(time.time())
+    enriched.update(reading._asdict())
     
     # Add derived features
-    enriched['temp_vib_ratio'] = float(enriched['temperature']) / (float(enriched['vibration']) + 0.001)
-    enriched['pressure_temp_ratio'] = float(enriched['pressure']) / (float(enriched['temperature']) + 0.001)
+    enriched['temp_vib_ratio'] = reading.temperature / (reading.vibration + 0.001)
+    enriched['pressure_temp_ratio'] = reading.pressure / (reading.temperature + 0.001)
     
     # Add metadata
     enriched['processed_at'] = datetime.utcnow().isoformat()
@@ -128,35 +207,120 @@ def enrich_sensor_data(record: Dict[str, Any]) -> Dict[str, Any]:
     
     return enriched
 
-def validate_transformed_data(data: Dict[str, Any]) -> bool:
+def chunk_records(entries: List[Dict[str, Any]], max_records: int, max_bytes: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Split put entries into batches that respect the service request limits
+    
+    Args:
+        entries: Put entries, each with a bytes/str 'Data' payload
+        max_records: Maximum number of entries per request
+        max_bytes: Maximum total payload size per request
+        
+    Yields:
+        Lists of entries sized for a single batch request
+    """
+    batch = []
+    batch_bytes = 0
+    
+    for entry in entries:
+        entry_bytes = len(entry['Data']) + len(entry.get('PartitionKey', ''))
+        if batch and (len(batch) >= max_records or batch_bytes + entry_bytes > max_bytes):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(entry)
+        batch_bytes += entry_bytes
+    
+    if batch:
+        yield batch
+
+def put_kinesis_records(entries: List[Dict[str, Any]]) -> int:
     """
-    Validate transformed data
+    Send entries to Kinesis with PutRecords, retrying only the failed entries
     
     Args:
-        data: Transformed data record
+        entries: Kinesis entries with 'Data' and 'PartitionKey'
         
     Returns:
-        bool: True if valid
+        int: Number of entries that could not be delivered
+    """
+    failed_count = 0
+    
+    for batch in chunk_records(entries, KINESIS_MAX_BATCH_RECORDS, KINESIS_MAX_BATCH_BYTES):
+        for attempt in range(MAX_PUT_RETRIES):
+            # The client has already retried throttling and transient errors, so an
+            # exception means the whole batch is lost rather than worth another round
+            try:
+                response = kinesis.put_records(
+                    StreamName=KINESIS_STREAM_NAME,
+                    Records=batch
+                )
+            except Exception as e:
+                logger.error(f"Failed to send to Kinesis: {str(e)}")
+                break
+            
+            if response.get('FailedRecordCount', 0) == 0:
+                batch = []
+                break
+            batch = [
+                entry for entry, result in zip(batch, response['Records'])
+                if 'ErrorCode' in result
+            ]
+            
+            if attempt < MAX_PUT_RETRIES - 1:
+                logger.warning(f"Retrying {len(batch)} Kinesis records (attempt {attempt + 1})")
+                time.sleep(PUT_RETRY_BASE_DELAY * (2 ** attempt))
         
-    Raises:
-        DataTransformationError: If data is invalid
+        failed_count += len(batch)
+    
+    if failed_count:
+        logger.error(f"Failed to send {failed_count} records to Kinesis")
+    
+    return failed_count
+
+def put_firehose_records(entries: List[Dict[str, Any]]) -> int:
     """
-    required_fields = ['machine_id', 'temperature', 'vibration', 'pressure', 'timestamp']
+    Send entries to Firehose with PutRecordBatch, retrying only the failed entries
     
-    for field in required_fields:
-        if field not in data:
-            raise DataTransformationError(f"Missing required field: {field}")
+    Args:
+        entries: Firehose entries with 'Data'
+        
+    Returns:
+        int: Number of entries that could not be delivered
+    """
+    failed_count = 0
     
-    # Validate data types
-    try:
-        float(data['temperature'])
-        float(data['vibration'])
-        float(data['pressure'])
-        int(data['timestamp'])
-    except (ValueError, TypeError) as e:
-        raise DataTransformationError(f"Invalid data type: {e}")
-    
-    return True
+    for batch in chunk_records(entries, FIREHOSE_MAX_BATCH_RECORDS, FIREHOSE_MAX_BATCH_BYTES):
+        for attempt in range(MAX_PUT_RETRIES):
+            # The client has already retried throttling and transient errors, so an
+            # exception means the whole batch is lost rather than worth another round
+            try:
+                response = firehose.put_record_batch(
+                    DeliveryStreamName=FIREHOSE_STREAM_NAME,
+                    Records=batch
+                )
+            except Exception as e:
+                logger.error(f"Failed to send to Firehose: {str(e)}")
+                break
+            
+            if response.get('FailedPutCount', 0) == 0:
+                batch = []
+                break
+            batch = [
+                entry for entry, result in zip(batch, response['RequestResponses'])
+                if 'ErrorCode' in result
+            ]
+            
+            if attempt < MAX_PUT_RETRIES - 1:
+                logger.warning(f"Retrying {len(batch)} Firehose records (attempt {attempt + 1})")
+                time.sleep(PUT_RETRY_BASE_DELAY * (2 ** attempt))
+        
+        failed_count += len(batch)
+    
+    if failed_count:
+        logger.error(f"Failed to send {failed_count} records to Firehose")
+    
+    return failed_count
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -177,24 +341,24 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             raise DataTransformationError("No records found in event")
         
         processed_records = []
+        readings = []
         
         for record in event['Records']:
             try:
                 # Parse the record
                 if 'kinesis' in record:
-                    payload = json.loads(record['kinesis']['data'].decode('utf-8'))
+                    payload = orjson.loads(record['kinesis']['data'])
                 else:
-                    payload = json.loads(record['body'])
+                    payload = orjson.loads(record['body'])
                 
                 logger.info(f"Processing record: {payload}")
                 
-                # Enrich the data
-                enriched_data = enrich_sensor_data(payload)
-                
-                # Validate transformed data
-                validate_transformed_data(enriched_data)
+                # Validate and convert the data
+                reading = parse_sensor_reading(payload)
                 
-                processed_records.append(enriched_data)
+                # Enrich the data
+                processed_records.append(enrich_sensor_data(payload, reading))
+                readings.append(reading)
                 
             except Exception as e:
                 logger.error(f"Failed to process record: {str(e)}")
@@ -205,64 +369,74 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         # Calculate statistical features if we have multiple records
         if len(processed_records) > 1:
-            stats_features = calculate_statistical_features(processed_records)
-            trends = detect_trends(processed_records)
+            stats_features = calculate_statistical_features(readings)
+            trends = detect_trends(readings)
             
             # Add statistical features to the latest record
             latest_record = processed_records[-1]
             latest_record.update(stats_features)
             latest_record.update(trends)
         
-        # Send to Kinesis for real-time processing
-        for record in processed_records:
-            try:
-                kinesis.put_record(
-                    StreamName=KINESIS_STREAM_NAME,
-                    Data=json.dumps(record),
-                    PartitionKey=record['machine_id']
-                )
-            except Exception as e:
-                logger.error(f"Failed to send to Kinesis: {str(e)}")
+        # Serialize once and reuse the payloads for both sinks
+        payloads = [orjson.dumps(record) for record in processed_records]
         
-        # Send to Firehose for batch processing
-        for record in processed_records:
-            try:
-                firehose.put_record(
-                    DeliveryStreamName=FIREHOSE_STREAM_NAME,
-                    Record={'Data': json.dumps(record)}
-                )
-            except Exception as e:
-                logger.error(f"Failed to send to Firehose: {str(e)}")
+        # Send to Kinesis for real-time processing and to Firehose for batch
+        # processing concurrently, since the two sinks are independent
+        kinesis_future = executor.submit(put_kinesis_records, [
+            {'Data': payload, 'PartitionKey': record['machine_id']}
+            for payload, record in zip(payloads, processed_records)
+        ])
+        firehose_future = executor.submit(put_firehose_records, [{'Data': payload} for payload in payloads])
+        
+        # result() re-raises any exception from the workers; the counts cover entries
+        # that were still rejected after the per-entry retries
+        kinesis_failed = kinesis_future.result()
+        firehose_failed = firehose_future.result()
         
         duration = (time.time() - start_time) * 1000
         
+        if kinesis_failed or firehose_failed:
+            logger.error(
+                f"Failed to deliver records: {kinesis_failed} to Kinesis, {firehose_failed} to Firehose"
+            )
+            return {
+                'statusCode': 500,
+                'body': orjson.dumps({
+                    'error': 'Record delivery failed',
+                    'processed_records': len(processed_records),
+                    'kinesis_failed_records': kinesis_failed,
+                    'firehose_failed_records': firehose_failed,
+                    'processing_time_ms': duration
+                }).decode()
+            }
+        
         logger.info(f"Successfully processed {len(processed_records)} records in {duration:.2f}ms")
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'processed_records': len(processed_records),
                 'processing_time_ms': duration,
                 'timestamp': datetime.utcnow().isoformat()
-            })
+            }).decode()
         }
         
     except DataTransformationError as e:
         logger.error(f"Data transformation error: {str(e)}")
         return {
             'statusCode': 400,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': 'Data transformation failed',
                 'message': str(e)
-            })
+            }).decode()
         }
         
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': 'Internal server error',
                 'message': str(e)
-            })
+            }).decode()
         } 
\ No newline at end of file
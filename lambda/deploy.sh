@@ -56,19 +56,27 @@ mkdir -p "$PACKAGE_DIR"
 # Copy Lambda function files
 cp inference_and_alert.py "$PACKAGE_DIR/"
 cp data_transformer.py "$PACKAGE_DIR/"
+cp terraform_iot_event.py "$PACKAGE_DIR/"
 
 # Create requirements.txt if it doesn't exist
 if [ ! -f requirements.txt ]; then
     print_status "Creating requirements.txt..."
     cat > requirements.txt << EOF
-boto3>=1.26.0
-botocore>=1.29.0
+numpy>=1.21.0
+orjson>=3.8.0
+fastjsonschema>=2.16.0
 EOF
 fi
 
-# Install dependencies
+# Install dependencies; boto3 comes with the Lambda runtime, and wheels are fetched
+# for the Lambda platform so builds on macOS or ARM hosts still load on Lambda
 print_status "Installing dependencies..."
-pip install -r requirements.txt -t "$PACKAGE_DIR/" --quiet
+pip install -r requirements.txt -t "$PACKAGE_DIR/" \
+    --platform manylinux2014_x86_64 \
+    --implementation cp \
+    --python-version 3.9 \
+    --only-binary=:all: \
+    --quiet
 
 # Create ZIP file
 print_status "Creating ZIP file..."
@@ -1,19 +1,39 @@
 import boto3
-import json
+from botocore.config import Config
+import fastjsonschema
 import logging
+import orjson
 import os
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize AWS clients
-runtime = boto3.client('sagemaker-runtime')
-sns = boto3.client('sns')
-cloudwatch = boto3.client('cloudwatch')
+# Initialize AWS clients once per container so warm invocations reuse connections.
+# total_max_attempts counts the first call, so an SNS publish takes at most
+# 2 attempts x (1 s connect + 3 s read) + backoff, about 9 s
+client_config = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    connect_timeout=1,
+    read_timeout=3,
+    retries={'mode': 'adaptive', 'total_max_attempts': 2}
+)
+# Retries for the batched inference call come from botocore, so the worst case has to fit
+# the 30 s function timeout: total_max_attempts counts the first call, and
+# 2 attempts x (1 s connect + 10 s read) + backoff is about 23 s, leaving time to return
+# the AnomalyDetectionError response instead of timing out
+runtime_config = client_config.merge(Config(
+    connect_timeout=1,
+    read_timeout=10,
+    retries={'mode': 'adaptive', 'total_max_attempts': 2}
+))
+
+runtime = boto3.client('sagemaker-runtime', config=runtime_config)
+sns = boto3.client('sns', config=client_config)
 
 # Environment variables
 SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN')
@@ -22,8 +42,8 @@ LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
 
 # Constants
 ANOMALY_THRESHOLD = 0.8
-MAX_RETRIES = 3
-RETRY_DELAY = 1  # seconds
+SNS_MAX_BATCH_SIZE = 10
+METRICS_NAMESPACE = 'IoT/PredictiveMaintenance'
 
 class AnomalyDetectionError(Exception):
     """Custom exception for anomaly detection errors"""
@@ -33,6 +53,17 @@ class DataValidationError(Exception):
     """Custom exception for data validation errors"""
     pass
 
+# Compiled once per container; each record is then checked with a single call
+validate_sensor_schema = fastjsonschema.compile({
+    'type': 'object',
+    'required': ['temperature', 'vibration', 'pressure'],
+    'properties': {
+        'temperature': {'type': 'number'},
+        'vibration': {'type': 'number'},
+        'pressure': {'type': 'number'}
+    }
+})
+
 def validate_sensor_data(data: Dict[str, Any]) -> bool:
     """
     Validate sensor data format and values
@@ -46,31 +77,25 @@ def validate_sensor_data(data: Dict[str, Any]) -> bool:
     Raises:
         DataValidationError: If data is invalid
     """
-    required_fields = ['temperature', 'vibration', 'pressure']
+    # Validate required fields and data types
+    try:
+        validate_sensor_schema(data)
+    except fastjsonschema.JsonSchemaException as e:
+        raise DataValidationError(f"Invalid sensor data: {str(e)}")
     
-    # Check required fields
-    for field in required_fields:
-        if field not in data:
-            raise DataValidationError(f"Missing required field: {field}")
+    temperature = data['temperature']
+    vibration = data['vibration']
+    pressure = data['pressure']
     
-    # Validate data types and ranges
-    try:
-        temperature = float(data['temperature'])
-        vibration = float(data['vibration'])
-        pressure = float(data['pressure'])
-        
-        # Check reasonable ranges for industrial sensors
-        if not (0 <= temperature <= 200):
-            logger.warning(f"Temperature out of expected range: {temperature}")
+    # Check reasonable ranges for industrial sensors
+    if not (0 <= temperature <= 200):
+        logger.warning(f"Temperature out of expected range: {temperature}")
+    
+    if not (0 <= vibration <= 10):
+        logger.warning(f"Vibration out of expected range: {vibration}")
         
-        if not (0 <= vibration <= 10):
-            logger.warning(f"Vibration out of expected range: {vibration}")
-            
-        if not (0 <= pressure <= 200):
-            logger.warning(f"Pressure out of expected range: {pressure}")
-            
-    except (ValueError, TypeError) as e:
-        raise DataValidationError(f"Invalid data type: {e}")
+    if not (0 <= pressure <= 200):
+        logger.warning(f"Pressure out of expected range: {pressure}")
     
     return True
 
@@ -96,71 +121,94 @@ def prepare_features(data: Dict[str, Any]) -> Dict[str, Any]:
     
     return features
 
-def invoke_sagemaker_endpoint(features: Dict[str, Any]) -> int:
+def invoke_sagemaker_endpoint(features: List[Dict[str, Any]]) -> List[int]:
     """
-    Invoke SageMaker endpoint for anomaly detection
+    Invoke SageMaker endpoint for anomaly detection on a batch of records
     
     Args:
-        features: Prepared feature dictionary
+        features: List of prepared feature dictionaries
         
     Returns:
-        int: Prediction (0 for normal, 1 for anomaly)
+        List[int]: Predictions (0 for normal, 1 for anomaly), one per feature dictionary
         
     Raises:
         AnomalyDetectionError: If inference fails
     """
     try:
-        payload = json.dumps(features)
+        payload = orjson.dumps({'instances': features})
         
         response = runtime.invoke_endpoint(
             EndpointName=SAGEMAKER_ENDPOINT,
             ContentType='application/json',
+            Accept='application/json',
             Body=payload
         )
         
-        prediction = int(response['Body'].read().decode())
-        logger.info(f"SageMaker prediction: {prediction}")
+        result = orjson.loads(response['Body'].read())
+        predictions = [int(item['prediction']) for item in result['predictions']]
+        
+        if len(predictions) != len(features):
+            raise AnomalyDetectionError(
+                f"Expected {len(features)} predictions, got {len(predictions)}"
+            )
+        
+        logger.info(f"SageMaker predictions: {predictions}")
         
-        return prediction
+        return predictions
         
     except Exception as e:
         logger.error(f"SageMaker inference failed: {str(e)}")
         raise AnomalyDetectionError(f"Inference failed: {str(e)}")
 
-def send_alert(machine_id: str, sensor_data: Dict[str, Any], prediction: int) -> None:
+def send_alerts(anomalies: List[Dict[str, Any]]) -> None:
     """
-    Send alert via SNS if anomaly is detected
+    Send alerts via SNS for detected anomalies
     
     Args:
-        machine_id: ID of the machine
-        sensor_data: Original sensor data
-        prediction: ML model prediction
+        anomalies: List of dicts with machine_id, sensor_data and prediction
     """
-    if prediction == 1:
+    timestamp = datetime.utcnow().isoformat()
+    
+    for start in range(0, len(anomalies), SNS_MAX_BATCH_SIZE):
+        batch = anomalies[start:start + SNS_MAX_BATCH_SIZE]
+        
         try:
-            message = {
-                'alert_type': 'anomaly_detected',
-                'machine_id': machine_id,
-                'timestamp': datetime.utcnow().isoformat(),
-                'sensor_data': sensor_data,
-                'prediction': prediction,
-                'severity': 'high'
-            }
+            entries = []
+            for i, anomaly in enumerate(batch):
+                message = {
+                    'alert_type': 'anomaly_detected',
+                    'machine_id': anomaly['machine_id'],
+                    'timestamp': timestamp,
+                    'sensor_data': anomaly['sensor_data'],
+                    'prediction': anomaly['prediction'],
+                    'severity': 'high'
+                }
+                entries.append({
+                    'Id': str(i),
+                    'Message': orjson.dumps(message, option=orjson.OPT_INDENT_2).decode(),
+                    'Subject': f"IoT Anomaly Alert - Machine {anomaly['machine_id']}"
+                })
             
-            sns.publish(
+            response = sns.publish_batch(
                 TopicArn=SNS_TOPIC_ARN,
-                Message=json.dumps(message, indent=2),
-                Subject=f"IoT Anomaly Alert - Machine {machine_id}"
+                PublishBatchRequestEntries=entries
             )
             
-            logger.info(f"Alert sent for machine {machine_id}")
+            for failure in response.get('Failed', []):
+                machine_id = batch[int(failure['Id'])]['machine_id']
+                logger.error(f"Failed to send alert for machine {machine_id}: {failure.get('Message')}")
+            
+            logger.info(f"Alerts sent: {len(response.get('Successful', []))}")
             
         except Exception as e:
-            logger.error(f"Failed to send alert: {str(e)}")
+            logger.error(f"Failed to send alerts: {str(e)}")
 
 def put_metrics(machine_id: str, sensor_data: Dict[str, Any], prediction: int, duration: float) -> None:
     """
-    Put custom metrics to CloudWatch
+    Put custom metrics to CloudWatch using the Embedded Metric Format
+    
+    The metrics are written as a structured log line that CloudWatch Logs
+    extracts asynchronously, so no PutMetricData call is made.
     
     Args:
         machine_id: ID of the machine
@@ -169,43 +217,33 @@ def put_metrics(machine_id: str, sensor_data: Dict[str, Any], prediction: int, d
         duration: Processing duration
     """
     try:
-        metrics = [
-            {
-                'MetricName': 'Temperature',
-                'Value': float(sensor_data['temperature']),
-                'Unit': 'None',
-                'Dimensions': [{'Name': 'MachineId', 'Value': machine_id}]
-            },
-            {
-                'MetricName': 'Vibration',
-                'Value': float(sensor_data['vibration']),
-                'Unit': 'None',
-                'Dimensions': [{'Name': 'MachineId', 'Value': machine_id}]
-            },
-            {
-                'MetricName': 'Pressure',
-                'Value': float(sensor_data['pressure']),
-                'Unit': 'None',
-                'Dimensions': [{'Name': 'MachineId', 'Value': machine_id}]
+        metrics = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [
+                    {
+                        'Namespace': METRICS_NAMESPACE,
+                        'Dimensions': [['MachineId']],
+                        'Metrics': [
+                            {'Name': 'Temperature', 'Unit': 'None'},
+                            {'Name': 'Vibration', 'Unit': 'None'},
+                            {'Name': 'Pressure', 'Unit': 'None'},
+                            {'Name': 'AnomalyPrediction', 'Unit': 'None'},
+                            {'Name': 'ProcessingDuration', 'Unit': 'Milliseconds'}
+                        ]
+                    }
+                ]
             },
-            {
-                'MetricName': 'AnomalyPrediction',
-                'Value': prediction,
-                'Unit': 'None',
-                'Dimensions': [{'Name': 'MachineId', 'Value': machine_id}]
-            },
-            {
-                'MetricName': 'ProcessingDuration',
-                'Value': duration,
-                'Unit': 'Milliseconds',
-                'Dimensions': [{'Name': 'MachineId', 'Value': machine_id}]
-            }
-        ]
+            'MachineId': machine_id,
+            'Temperature': float(sensor_data['temperature']),
+            'Vibration': float(sensor_data['vibration']),
+            'Pressure': float(sensor_data['pressure']),
+            'AnomalyPrediction': prediction,
+            'ProcessingDuration': duration
+        }
         
-        cloudwatch.put_metric_data(
-            Namespace='IoT/PredictiveMaintenance',
-            MetricData=metrics
-        )
+        # EMF lines must reach the log stream unprefixed, so bypass the logger
+        print(orjson.dumps(metrics).decode(), flush=True)
         
     except Exception as e:
         logger.error(f"Failed to put metrics: {str(e)}")
@@ -224,95 +262,107 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     start_time = time.time()
     
     try:
-        # Extract record from Kinesis event
+        # Extract records from Kinesis event
         if 'Records' not in event or not event['Records']:
             raise DataValidationError("No records found in event")
         
-        record = event['Records'][0]
+        machine_ids = []
+        sensor_readings = []
+        features = []
         
-        # Parse the record body
-        if 'kinesis' in record:
-            # Kinesis record
-            payload = json.loads(record['kinesis']['data'].decode('utf-8'))
-        else:
-            # Direct JSON record
-            payload = json.loads(record['body'])
-        
-        logger.info(f"Processing record: {payload}")
-        
-        # Extract machine ID and sensor data
-        machine_id = payload.get('machine_id', 'unknown')
-        sensor_data = {
-            'temperature': payload.get('temperature'),
-            'vibration': payload.get('vibration'),
-            'pressure': payload.get('pressure')
-        }
-        
-        # Validate sensor data
-        validate_sensor_data(sensor_data)
+        for record in event['Records']:
+            try:
+                # Parse the record body
+                if 'kinesis' in record:
+                    # Kinesis record
+                    payload = orjson.loads(record['kinesis']['data'])
+                else:
+                    # Direct JSON record
+                    payload = orjson.loads(record['body'])
+                
+                logger.info(f"Processing record: {payload}")
+                
+                # Extract machine ID and sensor data
+                machine_id = payload.get('machine_id', 'unknown')
+                sensor_data = {
+                    'temperature': payload.get('temperature'),
+                    'vibration': payload.get('vibration'),
+                    'pressure': payload.get('pressure')
+                }
+                
+                # Validate sensor data
+                validate_sensor_data(sensor_data)
+                
+                # Prepare features for ML model
+                features.append(prepare_features(sensor_data))
+                machine_ids.append(machine_id)
+                sensor_readings.append(sensor_data)
+                
+            except Exception as e:
+                logger.error(f"Failed to process record: {str(e)}")
+                continue
         
-        # Prepare features for ML model
-        features = prepare_features(sensor_data)
+        if not features:
+            raise DataValidationError("No valid records found in event")
         
-        # Invoke SageMaker endpoint with retry logic
-        prediction = None
-        for attempt in range(MAX_RETRIES):
-            try:
-                prediction = invoke_sagemaker_endpoint(features)
-                break
-            except AnomalyDetectionError as e:
-                if attempt == MAX_RETRIES - 1:
-                    raise
-                logger.warning(f"Attempt {attempt + 1} failed, retrying...")
-                time.sleep(RETRY_DELAY * (attempt + 1))
+        # Invoke SageMaker endpoint once for the whole batch; retries with jittered
+        # backoff are handled by the client's adaptive retry mode
+        predictions = invoke_sagemaker_endpoint(features)
         
-        # Send alert if anomaly detected
-        send_alert(machine_id, sensor_data, prediction)
+        # Send alerts for detected anomalies
+        anomalies = [
+            {'machine_id': machine_id, 'sensor_data': sensor_data, 'prediction': prediction}
+            for machine_id, sensor_data, prediction in zip(machine_ids, sensor_readings, predictions)
+            if prediction == 1
+        ]
+        if anomalies:
+            send_alerts(anomalies)
         
         # Calculate processing duration
         duration = (time.time() - start_time) * 1000  # Convert to milliseconds
         
         # Put metrics to CloudWatch
-        put_metrics(machine_id, sensor_data, prediction, duration)
+        for machine_id, sensor_data, prediction in zip(machine_ids, sensor_readings, predictions):
+            put_metrics(machine_id, sensor_data, prediction, duration)
         
-        logger.info(f"Successfully processed record for machine {machine_id}")
+        logger.info(f"Successfully processed {len(predictions)} records")
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
-                'machine_id': machine_id,
-                'prediction': prediction,
+            'body': orjson.dumps({
+                'processed_records': len(predictions),
+                'anomalies_detected': len(anomalies),
                 'processing_time_ms': duration,
                 'timestamp': datetime.utcnow().isoformat()
-            })
+            }).decode()
         }
         
     except DataValidationError as e:
         logger.error(f"Data validation error: {str(e)}")
         return {
             'statusCode': 400,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': 'Data validation failed',
                 'message': str(e)
-            })
+            }).decode()
         }
         
     except AnomalyDetectionError as e:
         logger.error(f"Anomaly detection error: {str(e)}")
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': 'Anomaly detection failed',
                 'message': str(e)
-            })
+            }).decode()
         }
         
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': 'Internal server error',
                 'message': str(e)
-            })
+            }).decode()
         }
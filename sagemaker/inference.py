@@ -8,9 +8,16 @@ import os
 import json
 import logging
 import numpy as np
-import pandas as pd
-from typing import Dict, Any, List
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
 import joblib
+from numba import njit
+
+# Optional runtime for the natively compiled model exported at training time
+try:
+    import tl2cgen
+except ImportError:
+    tl2cgen = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +26,11 @@ logger = logging.getLogger(__name__)
 # Global variables
 model = None
 scaler = None
+predictor = None
+
+# Column layout of the model input: raw readings followed by the derived ratios
+FEATURE_NAMES = ['temperature', 'vibration', 'pressure']
+NUM_FEATURES = 5
 
 def model_fn(model_dir: str):
     """
@@ -30,7 +42,7 @@ def model_fn(model_dir: str):
     Returns:
         Loaded model
     """
-    global model, scaler
+    global model, scaler, predictor
     
     try:
         # Load the model
@@ -44,44 +56,97 @@ def model_fn(model_dir: str):
             scaler = joblib.load(scaler_path)
             logger.info("Scaler loaded successfully")
         
+        # Prefer the compiled model when it was shipped; the joblib model stays as a fallback
+        lib_path = os.path.join(model_dir, 'model.so')
+        if tl2cgen is not None and os.path.exists(lib_path):
+            try:
+                predictor = tl2cgen.Predictor(lib_path)
+                logger.info(f"Compiled model loaded successfully from {lib_path}")
+            except Exception as e:
+                logger.warning(f"Failed to load compiled model, using joblib model: {str(e)}")
+        
         return model
         
     except Exception as e:
         logger.error(f"Error loading model: {str(e)}")
         raise
 
+@njit('void(float32[:, ::1])', cache=True)
+def _derive_ratios(features):
+    """
+    Fill the temp_vib_ratio and pressure_temp_ratio columns in place
+    
+    Compiled eagerly from the explicit signature at import, and cached on disk
+    so later cold starts load the machine code instead of recompiling it.
+    """
+    for i in range(features.shape[0]):
+        features[i, 3] = features[i, 0] / (features[i, 1] + 0.001)  # temp_vib_ratio
+        features[i, 4] = features[i, 2] / (features[i, 0] + 0.001)  # pressure_temp_ratio
+
+def extract_features(input_data: Dict[str, Any]) -> List[float]:
+    """
+    Extract the raw sensor readings from a single sensor record
+    
+    Args:
+        input_data: Sensor record dictionary
+        
+    Returns:
+        List of raw feature values
+    """
+    features = []
+    
+    for feature in FEATURE_NAMES:
+        if feature in input_data:
+            features.append(float(input_data[feature]))
+        else:
+            logger.warning(f"Missing feature: {feature}, using default value 0")
+            features.append(0.0)
+    
+    return features
+
+def build_feature_matrix(records: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Build the model input matrix for a list of sensor records
+    
+    Args:
+        records: Sensor record dictionaries
+        
+    Returns:
+        float32 array of shape (len(records), 5) with raw and derived features
+    """
+    features = np.empty((len(records), NUM_FEATURES), dtype=np.float32)
+    
+    for i, record in enumerate(records):
+        features[i, :3] = extract_features(record)
+    
+    _derive_ratios(features)
+    
+    return features
+
 def input_fn(request_body: str, content_type: str = 'application/json') -> np.ndarray:
     """
     Parse input data
     
+    Accepts either a single sensor record or a batch of records in the form
+    {"instances": [record, ...]}.
+    
     Args:
         request_body: Request body as string
         content_type: Content type of the request
         
     Returns:
-        Parsed input data as numpy array
+        Parsed input data as numpy array with one row per record
     """
     try:
         if content_type == 'application/json':
             input_data = json.loads(request_body)
             
-            # Extract features
-            features = []
-            feature_names = ['temperature', 'vibration', 'pressure']
-            
-            for feature in feature_names:
-                if feature in input_data:
-                    features.append(float(input_data[feature]))
-                else:
-                    logger.warning(f"Missing feature: {feature}, using default value 0")
-                    features.append(0.0)
-            
-            # Add derived features
-            temp, vib, pressure = features[:3]
-            features.append(temp / (vib + 0.001))  # temp_vib_ratio
-            features.append(pressure / (temp + 0.001))  # pressure_temp_ratio
+            if 'instances' in input_data:
+                return build_feature_matrix(input_data['instances'])
             
-            return np.array(features).reshape(1, -1)
+            # Each request gets its own row; the serving workers interleave concurrent
+            # requests, so a shared buffer could be overwritten before predict_fn reads it
+            return build_feature_matrix([input_data])
             
         else:
             raise ValueError(f"Unsupported content type: {content_type}")
@@ -90,7 +155,58 @@ def input_fn(request_body: str, content_type: str = 'application/json') -> np.nd
         logger.error(f"Error parsing input: {str(e)}")
         raise
 
-def predict_fn(input_data: np.ndarray, model) -> np.ndarray:
+def compiled_predict_proba(features: np.ndarray) -> np.ndarray:
+    """
+    Score a batch of feature rows with the compiled model
+    
+    Args:
+        features: Feature matrix with one row per record
+        
+    Returns:
+        Class probabilities with one column per class, matching predict_proba
+    """
+    scores = predictor.predict(tl2cgen.DMatrix(features)).reshape(len(features), -1)
+    
+    # Binary models emit only the positive-class probability
+    if scores.shape[1] == 1:
+        scores = np.hstack([1 - scores, scores])
+    
+    return scores
+
+def predict_with_confidence(features: np.ndarray, model) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Predict a batch of feature rows with a single model pass
+    
+    When the model exposes predict_proba, the class predictions are taken from
+    the same probabilities that provide the confidence scores, so the trees are
+    only evaluated once per batch.
+    
+    Args:
+        features: Feature matrix with one row per record
+        model: Loaded model
+        
+    Returns:
+        Tuple of predictions and confidence scores (None if the model has no predict_proba)
+    """
+    # Scale features if scaler is available
+    if scaler is not None:
+        features = scaler.transform(features)
+    
+    if predictor is not None:
+        prediction_proba = compiled_predict_proba(features)
+    else:
+        try:
+            prediction_proba = model.predict_proba(features)
+        except AttributeError:
+            return model.predict(features), None
+    
+    best = prediction_proba.argmax(axis=1)
+    predictions = model.classes_[best]
+    confidences = prediction_proba[np.arange(len(best)), best]
+    
+    return predictions, confidences
+
+def predict_fn(input_data: np.ndarray, model) -> Tuple[np.ndarray, Optional[np.ndarray]]:
     """
     Make predictions using the loaded model
     
@@ -99,50 +215,48 @@ def predict_fn(input_data: np.ndarray, model) -> np.ndarray:
         model: Loaded model
         
     Returns:
-        Predictions as numpy array
+        Tuple of predictions and confidence scores, one per input row
     """
     try:
-        # Scale features if scaler is available
-        if scaler is not None:
-            input_data = scaler.transform(input_data)
+        predictions, confidences = predict_with_confidence(input_data, model)
+        logger.info(f"Predicted {len(predictions)} records, {int(np.count_nonzero(predictions == 1))} anomalies")
         
-        # Make prediction
-        prediction = model.predict(input_data)
-        
-        # Get prediction probabilities if available
-        try:
-            prediction_proba = model.predict_proba(input_data)
-            logger.info(f"Prediction: {prediction[0]}, Probability: {prediction_proba[0]}")
-        except AttributeError:
-            logger.info(f"Prediction: {prediction[0]}")
-        
-        return prediction
+        return predictions, confidences
         
     except Exception as e:
         logger.error(f"Error making prediction: {str(e)}")
         raise
 
-def output_fn(prediction: np.ndarray, accept: str = 'application/json') -> str:
+def output_fn(prediction: Tuple[np.ndarray, Optional[np.ndarray]], accept: str = 'application/json') -> str:
     """
     Format the prediction output
     
     Args:
-        prediction: Model predictions
+        prediction: Tuple of predictions and confidence scores from predict_fn
         accept: Accept header for response format
         
     Returns:
         Formatted prediction output
     """
     try:
+        predictions, confidences = prediction
+        
         if accept == 'application/json':
             output = {
-                'prediction': int(prediction[0]),
-                'prediction_label': 'anomaly' if prediction[0] == 1 else 'normal',
-                'confidence': 0.8  # Placeholder confidence score
+                'predictions': [
+                    {
+                        'prediction': int(p),
+                        'prediction_label': 'anomaly' if p == 1 else 'normal'
+                    }
+                    for p in predictions
+                ]
             }
+            if confidences is not None:
+                for item, confidence in zip(output['predictions'], confidences.tolist()):
+                    item['confidence'] = confidence
             return json.dumps(output)
         else:
-            return str(prediction[0])
+            return '\n'.join(str(p) for p in predictions)
             
     except Exception as e:
         logger.error(f"Error formatting output: {str(e)}")
@@ -197,18 +311,7 @@ def preprocess_features(input_data: Dict[str, Any]) -> np.ndarray:
     Returns:
         Preprocessed features as numpy array
     """
-    features = [
-        float(input_data['temperature']),
-        float(input_data['vibration']),
-        float(input_data['pressure'])
-    ]
-    
-    # Add derived features
-    temp, vib, pressure = features
-    features.append(temp / (vib + 0.001))  # temp_vib_ratio
-    features.append(pressure / (temp + 0.001))  # pressure_temp_ratio
-    
-    return np.array(features).reshape(1, -1)
+    return build_feature_matrix([input_data])
 
 def postprocess_prediction(prediction: int, confidence: float = None) -> Dict[str, Any]:
     """
@@ -225,7 +328,7 @@ def postprocess_prediction(prediction: int, confidence: float = None) -> Dict[st
         'prediction': int(prediction),
         'prediction_label': 'anomaly' if prediction == 1 else 'normal',
         'severity': 'high' if prediction == 1 else 'normal',
-        'timestamp': pd.Timestamp.now().isoformat()
+        'timestamp': datetime.now(timezone.utc).isoformat()
     }
     
     if confidence is not None:
@@ -253,17 +356,11 @@ def predict(input_data: Dict[str, Any]) -> Dict[str, Any]:
         features = preprocess_features(input_data)
         
         # Make prediction
-        prediction = model.predict(features)[0]
-        
-        # Get confidence if available
-        try:
-            prediction_proba = model.predict_proba(features)[0]
-            confidence = max(prediction_proba)
-        except AttributeError:
-            confidence = None
+        predictions, confidences = predict_with_confidence(features, model)
+        confidence = None if confidences is None else float(confidences[0])
         
         # Postprocess output
-        result = postprocess_prediction(prediction, confidence)
+        result = postprocess_prediction(predictions[0], confidence)
         
         logger.info(f"Prediction completed: {result}")
         
@@ -272,20 +369,3 @@ def predict(input_data: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
         raise
-
-# For backward compatibility
-def model_fn(model_dir):
-    """Load model for SageMaker"""
-    return model_fn(model_dir)
-
-def predict_fn(input_data, model):
-    """Make predictions for SageMaker"""
-    return predict_fn(input_data, model)
-
-def input_fn(request_body, content_type='application/json'):
-    """Parse input for SageMaker"""
-    return input_fn(request_body, content_type)
-
-def output_fn(prediction, accept='application/json'):
-    """Format output for SageMaker"""
-    return output_fn(prediction, accept)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+SageMaker Training Entry Point
+Trains the anomaly detection model inside the SageMaker training job
+"""
+
+import os
+import logging
+import argparse
+import numpy as np
+import pyarrow.parquet as pq
+import joblib
+from typing import Tuple
+
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Constants
+FEATURE_COLUMNS = ['temperature', 'vibration', 'pressure', 'temp_vib_ratio', 'pressure_temp_ratio']
+LABEL_COLUMN = 'anomaly_score'
+TRAINING_DATA_FILE = 'training_data.parquet'
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse hyperparameters and SageMaker job paths
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Train anomaly detection model in SageMaker')
+    parser.add_argument('--max_iter', type=int, default=200)
+    parser.add_argument('--max_depth', type=int, default=8)
+    parser.add_argument('--random_state', type=int, default=42)
+    parser.add_argument('--model-dir', type=str, default=os.environ.get('SM_MODEL_DIR', '/opt/ml/model'))
+    parser.add_argument('--train', type=str, default=os.environ.get('SM_CHANNEL_TRAIN', '/opt/ml/input/data/train'))
+
+    return parser.parse_args()
+
+def load_training_data(train_dir: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load the training channel with a columnar Parquet read
+
+    Args:
+        train_dir: Directory of the train channel
+
+    Returns:
+        Tuple of features and labels
+    """
+    table = pq.read_table(
+        os.path.join(train_dir, TRAINING_DATA_FILE),
+        columns=FEATURE_COLUMNS + [LABEL_COLUMN]
+    )
+
+    X = np.column_stack([table.column(name).to_numpy() for name in FEATURE_COLUMNS])
+    y = table.column(LABEL_COLUMN).to_numpy()
+
+    logger.info(f"Loaded training data: {X.shape}")
+
+    return X, y
+
+def export_compiled_model(model: HistGradientBoostingClassifier, lib_path: str) -> bool:
+    """
+    Compile the trained trees to a native shared library with treelite and tl2cgen
+
+    The library is built inside the training job, on the same SKLearn image the
+    endpoint serves from, so it is ABI-compatible with the serving container.
+    Export is skipped if the compilers or toolchain are unavailable, leaving the
+    joblib model as the only artifact.
+
+    Args:
+        model: Trained model
+        lib_path: Path to write the shared library
+
+    Returns:
+        True if the library was exported, False otherwise
+    """
+    try:
+        import tl2cgen
+        import treelite.sklearn
+    except ImportError:
+        logger.warning("treelite/tl2cgen not installed, skipping compiled model export")
+        return False
+
+    try:
+        tl_model = treelite.sklearn.import_model(model)
+        tl2cgen.export_lib(tl_model, toolchain='gcc', libpath=lib_path, params={'parallel_comp': 4})
+        logger.info(f"Compiled model exported to: {lib_path}")
+        return True
+
+    except Exception as e:
+        logger.warning(f"Compiled model export failed: {str(e)}")
+        return False
+
+def main():
+    """Main function"""
+    args = parse_args()
+
+    X, y = load_training_data(args.train)
+
+    model = HistGradientBoostingClassifier(
+        max_iter=args.max_iter,
+        max_depth=args.max_depth,
+        early_stopping=True,
+        scoring='roc_auc',
+        random_state=args.random_state
+    )
+    model.fit(X, y)
+    logger.info(f"Model trained with {model.n_iter_} boosting iterations")
+
+    model_path = os.path.join(args.model_dir, 'model.joblib')
+    # lz4 keeps the artifact small for the endpoint's download while still decompressing quickly at load
+    joblib.dump(model, model_path, compress=('lz4', 3))
+    logger.info(f"Model saved to: {model_path}")
+
+    # Ship a natively compiled copy in the model artifact; the endpoint prefers it when it loads
+    export_compiled_model(model, os.path.join(args.model_dir, 'model.so'))
+
+if __name__ == "__main__":
+    main()
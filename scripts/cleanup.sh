@@ -343,7 +343,7 @@ cleanup_local_files() {
     rm -f infrastructure_outputs.json
     rm -rf lambda/lambda_function.zip
     rm -rf sagemaker/models
-    rm -f sagemaker/training_data.csv
+    rm -f sagemaker/training_data.parquet
     
     # Remove virtual environment
     if [ -d "venv" ]; then
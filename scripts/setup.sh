@@ -89,7 +89,7 @@ install_dependencies() {
     # Install dependencies
     print_status "Installing Python packages..."
     pip install --upgrade pip
-    pip install boto3 sagemaker pandas numpy scikit-learn paho-mqtt
+    pip install boto3 sagemaker pandas numpy pyarrow scikit-learn lz4 paho-mqtt
     
     print_status "Python dependencies installed successfully!"
 }
@@ -264,8 +264,8 @@ anomaly_indices = np.random.choice(n_samples, 50, replace=False)
 data.loc[anomaly_indices, 'temperature'] += 30
 data.loc[anomaly_indices, 'vibration'] += 2
 
-data.to_csv('training_data.csv', index=False)
-print('Test data created: training_data.csv')
+data.to_parquet('training_data.parquet', engine='pyarrow', compression='zstd', index=False)
+print('Test data created: training_data.parquet')
 "
     
     cd ..
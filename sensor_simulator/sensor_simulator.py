@@ -1,9 +1,11 @@
 # sensor_simulator.py
+import asyncio
 import time
 import json
-import random
 import ssl
+import numpy as np
 import paho.mqtt.client as mqtt
+from numba import njit
 
 client_id = "sensor-device-01"
 endpoint = "<your-iot-endpoint>"  # e.g., a3k7odshai.iot.eu-central-1.amazonaws.com
@@ -14,22 +16,52 @@ ca_path = "./AmazonRootCA1.pem"
 cert_path = "./device-certificate.pem.crt"
 key_path = "./private.pem.key"
 
-def get_sensor_data():
+sensor_count = 1  # simulated machines sharing one MQTT connection
+publish_interval = 5  # seconds
+batch_size = 128  # readings generated per kernel call
+
+# The explicit signature compiles the kernel at import, and cache=True lets later runs load it from disk
+@njit('void(float64[:, ::1])', cache=True)
+def generate_readings(out):
+    # Fill each row with temperature, vibration and pressure rounded to 2 decimals
+    for i in range(out.shape[0]):
+        out[i, 0] = round(40 + 50 * np.random.random(), 2)
+        out[i, 1] = round(0.1 + 2.4 * np.random.random(), 2)
+        out[i, 2] = round(80 + 40 * np.random.random(), 2)
+
+def get_sensor_data(machine_id, reading):
+    temperature, vibration, pressure = reading
     return {
-        "machine_id": "MCH001",
+        "machine_id": machine_id,
         "timestamp": int(time.time()),
-        "temperature": round(random.uniform(40, 90), 2),
-        "vibration": round(random.uniform(0.1, 2.5), 2),
-        "pressure": round(random.uniform(80, 120), 2)
+        "temperature": temperature,
+        "vibration": vibration,
+        "pressure": pressure
     }
 
-client = mqtt.Client(client_id)
-client.tls_set(ca_path, certfile=cert_path, keyfile=key_path, tls_version=ssl.PROTOCOL_TLSv1_2)
-client.connect(endpoint, 8883, 60)
-client.loop_start()
+async def run_sensor(client, machine_id):
+    # Readings are generated a batch at a time but still published one message each,
+    # since the downstream IoT rule and Lambdas expect a single reading per payload
+    readings = np.empty((batch_size, 3), dtype=np.float64)
+    while True:
+        generate_readings(readings)
+        for reading in readings.tolist():
+            payload = get_sensor_data(machine_id, reading)
+            # With loop_start the network thread sends the message; publish only queues it
+            client.publish(topic, json.dumps(payload), qos=1)
+            print("Published:", payload)
+            await asyncio.sleep(publish_interval)
+
+async def run_sensors(client):
+    await asyncio.gather(*(run_sensor(client, f"MCH{i + 1:03d}") for i in range(sensor_count)))
+
+def main():
+    client = mqtt.Client(client_id)
+    client.tls_set(ca_path, certfile=cert_path, keyfile=key_path, tls_version=ssl.PROTOCOL_TLSv1_2)
+    client.connect(endpoint, 8883, 60)
+    client.loop_start()
+
+    asyncio.run(run_sensors(client))
 
-while True:
-    payload = get_sensor_data()
-    client.publish(topic, json.dumps(payload), qos=1)
-    print("Published:", payload)
-    time.sleep(5)
+if __name__ == "__main__":
+    main()
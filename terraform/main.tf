@@ -5,6 +5,10 @@ terraform {
       source  = "hashicorp/aws"
       version = "~> 5.0"
     }
+    null = {
+      source  = "hashicorp/null"
+      version = "~> 3.0"
+    }
   }
 }
 
@@ -206,6 +210,15 @@ resource "aws_iam_role_policy" "firehose_policy" {
           "${aws_s3_bucket.iot_data.arn}/*"
         ]
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "glue:GetTable",
+          "glue:GetTableVersion",
+          "glue:GetTableVersions"
+        ]
+        Resource = "*"
+      },
       {
         Effect = "Allow"
         Action = [
@@ -290,16 +303,39 @@ resource "aws_iam_role_policy" "lambda_policy" {
 # Kinesis Firehose
 resource "aws_kinesis_firehose_delivery_stream" "iot_firehose" {
   name        = "${var.project_name}-iot-firehose"
-  destination = "s3"
+  destination = "extended_s3"
+
+  extended_s3_configuration {
+    role_arn            = aws_iam_role.firehose_role.arn
+    bucket_arn          = aws_s3_bucket.iot_data.arn
+    prefix              = "parquet/sensor_data/year=!{timestamp:yyyy}/month=!{timestamp:MM}/day=!{timestamp:dd}/hour=!{timestamp:HH}/"
+    error_output_prefix = "errors/!{firehose:error-output-type}/year=!{timestamp:yyyy}/month=!{timestamp:MM}/day=!{timestamp:dd}/"
+    buffering_size      = var.firehose_buffering_size
+    buffering_interval  = var.firehose_buffering_interval
+    # Parquet output is compressed by the serializer; the stream itself must stay uncompressed
+    compression_format  = "UNCOMPRESSED"
+
+    data_format_conversion_configuration {
+      input_format_configuration {
+        deserializer {
+          open_x_json_ser_de {}
+        }
+      }
 
-  s3_configuration {
-    role_arn           = aws_iam_role.firehose_role.arn
-    bucket_arn         = aws_s3_bucket.iot_data.arn
-    prefix             = "sensor_data/year=!{timestamp:yyyy}/month=!{timestamp:MM}/day=!{timestamp:dd}/hour=!{timestamp:HH}/"
-    error_output_prefix = "errors/"
-    buffering_size     = 5
-    buffering_interval = 60
-    compression_format = "GZIP"
+      output_format_configuration {
+        serializer {
+          parquet_ser_de {
+            compression = "SNAPPY"
+          }
+        }
+      }
+
+      schema_configuration {
+        database_name = aws_glue_catalog_database.iot_database.name
+        table_name    = aws_glue_catalog_table.sensor_data_raw.name
+        role_arn      = aws_iam_role.firehose_role.arn
+      }
+    }
   }
 
   tags = {
@@ -315,12 +351,52 @@ data "archive_file" "lambda_zip" {
   excludes    = ["lambda_function.zip", "deploy.sh", "requirements.txt"]
 }
 
+# Lambda dependency layer; wheels are fetched for the Lambda platform rather than
+# the build host, so the layer loads on python3.9 x86_64 regardless of where it is built
+resource "null_resource" "lambda_layer_build" {
+  triggers = {
+    requirements = filesha256("../lambda/requirements.txt")
+  }
+
+  provisioner "local-exec" {
+    command = <<-EOT
+      rm -rf ${path.module}/build/lambda_layer
+      pip install -r ../lambda/requirements.txt \
+        -t ${path.module}/build/lambda_layer/python \
+        --platform manylinux2014_x86_64 \
+        --implementation cp \
+        --python-version 3.9 \
+        --only-binary=:all: \
+        --quiet
+    EOT
+  }
+}
+
+data "archive_file" "lambda_layer_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/build/lambda_layer"
+  output_path = "${path.module}/build/lambda_layer.zip"
+
+  depends_on = [null_resource.lambda_layer_build]
+}
+
+resource "aws_lambda_layer_version" "lambda_dependencies" {
+  filename                 = data.archive_file.lambda_layer_zip.output_path
+  source_code_hash         = data.archive_file.lambda_layer_zip.output_base64sha256
+  layer_name               = "${var.project_name}-lambda-dependencies"
+  compatible_runtimes      = ["python3.9"]
+  compatible_architectures = ["x86_64"]
+}
+
 resource "aws_lambda_function" "inference_and_alert" {
   filename         = data.archive_file.lambda_zip.output_path
+  source_code_hash = data.archive_file.lambda_zip.output_base64sha256
   function_name    = "${var.project_name}-inference-alert"
   role            = aws_iam_role.lambda_role.arn
   handler         = "inference_and_alert.lambda_handler"
   runtime         = "python3.9"
+  architectures   = ["x86_64"]
+  layers          = [aws_lambda_layer_version.lambda_dependencies.arn]
   timeout         = 30
   memory_size     = 256
 
@@ -400,6 +476,97 @@ resource "aws_glue_catalog_database" "iot_database" {
   }
 }
 
+# Schema used by Firehose to convert incoming JSON records to Parquet
+resource "aws_glue_catalog_table" "sensor_data_raw" {
+  name          = "sensor_data_raw"
+  database_name = aws_glue_catalog_database.iot_database.name
+  table_type    = "EXTERNAL_TABLE"
+
+  parameters = {
+    classification = "parquet"
+  }
+
+  partition_keys {
+    name = "year"
+    type = "string"
+  }
+
+  partition_keys {
+    name = "month"
+    type = "string"
+  }
+
+  partition_keys {
+    name = "day"
+    type = "string"
+  }
+
+  partition_keys {
+    name = "hour"
+    type = "string"
+  }
+
+  storage_descriptor {
+    location      = "s3://${aws_s3_bucket.iot_data.bucket}/parquet/sensor_data/"
+    input_format  = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat"
+    output_format = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat"
+
+    ser_de_info {
+      serialization_library = "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe"
+    }
+
+    columns {
+      name = "machine_id"
+      type = "string"
+    }
+
+    columns {
+      name = "temperature"
+      type = "double"
+    }
+
+    columns {
+      name = "vibration"
+      type = "double"
+    }
+
+    columns {
+      name = "pressure"
+      type = "double"
+    }
+
+    columns {
+      name = "timestamp"
+      type = "bigint"
+    }
+
+    columns {
+      name = "temp_vib_ratio"
+      type = "double"
+    }
+
+    columns {
+      name = "pressure_temp_ratio"
+      type = "double"
+    }
+
+    columns {
+      name = "anomaly_score"
+      type = "int"
+    }
+
+    columns {
+      name = "processed_at"
+      type = "string"
+    }
+
+    columns {
+      name = "data_version"
+      type = "string"
+    }
+  }
+}
+
 resource "aws_iam_role" "glue_role" {
   name = "${var.project_name}-glue-role"
 
@@ -455,8 +622,16 @@ resource "aws_glue_crawler" "iot_crawler" {
   database_name = aws_glue_catalog_database.iot_database.name
   role          = aws_iam_role.glue_role.arn
 
-  s3_target {
-    path = "s3://${aws_s3_bucket.iot_data.bucket}/sensor_data/"
+  # Crawl the Terraform-managed table rather than its S3 prefix so the crawler only
+  # registers new hourly partitions and never rewrites the schema Firehose converts with
+  catalog_target {
+    database_name = aws_glue_catalog_database.iot_database.name
+    tables        = [aws_glue_catalog_table.sensor_data_raw.name]
+  }
+
+  schema_change_policy {
+    update_behavior = "LOG"
+    delete_behavior = "LOG"
   }
 
   schedule = "cron(0 */6 * * ? *)"  # Run every 6 hours
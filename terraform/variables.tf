@@ -89,15 +89,15 @@ variable "lambda_memory_size" {
 }
 
 variable "firehose_buffering_size" {
-  description = "Firehose buffering size in MB"
+  description = "Firehose buffering size in MB (at least 64 when converting to Parquet)"
   type        = number
-  default     = 5
+  default     = 128
 }
 
 variable "firehose_buffering_interval" {
   description = "Firehose buffering interval in seconds"
   type        = number
-  default     = 60
+  default     = 300
 }
 
 variable "glue_crawler_schedule" {